@@ -2,7 +2,9 @@
 # app.py — Drag & drop .mp4 + .srt → synthesize timed speech and replace video audio
 # Uses /usr/bin/say (rate locked to 200 WPM) and bundled ffmpeg.
 
-import os, re, shutil, subprocess, tempfile, threading, datetime
+import audioop, ctypes, functools, hashlib, json, math, mmap, os, platform, queue, re, shutil, struct, subprocess, tempfile, threading, time, datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import objc
@@ -15,15 +17,15 @@ from AppKit import (
     NSPasteboardTypeFileURL, NSPasteboardURLReadingFileURLsOnlyKey,
     NSAlert, NSAlertStyleInformational
 )
-from Foundation import NSObject
-
-import srt
-from pydub import AudioSegment
+from Foundation import NSObject, NSOperationQueue
 
 # ---------- config ----------
 RATE_WPM = 200            # fixed speaking rate
 DEBUG_KEEP_FILES = False   # when False, do NOT write to LOGFILE at all
 UI_TITLE = "SayMySubtitles"
+FASTSTART = False          # +faststart remuxes the whole output to front-load moov
+CACHE_DIR = Path.home() / "Library/Caches/SayMySubtitles"
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # prune oldest entries past this
 
 # ---------- logging & helpers ----------
 
@@ -32,24 +34,56 @@ LOGFILE = str(Path.home() / "Library/Logs/SRTTimedSpeech.log")
 def _ts():
     return datetime.datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
 
+# Log writes happen on one background thread fed by a lock-free queue, so
+# worker threads never block on file I/O even with DEBUG_KEEP_FILES on.
+_log_queue = queue.SimpleQueue()
+_log_writer_started = False
+_log_writer_lock = threading.Lock()
+
+def _log_writer():
+    while True:
+        line = _log_queue.get()
+        try:
+            with open(LOGFILE, "a", encoding="utf-8") as f:
+                f.write(line)
+                # drain whatever queued up while we held the file open
+                while True:
+                    try:
+                        f.write(_log_queue.get_nowait())
+                    except queue.Empty:
+                        break
+        except Exception:
+            pass
+
 def append_log(txt: str):
-    """Write a line to the logfile only when DEBUG_KEEP_FILES=True."""
+    """Queue a line for the logfile only when DEBUG_KEEP_FILES=True."""
     if not DEBUG_KEEP_FILES:
         return
-    try:
-        with open(LOGFILE, "a", encoding="utf-8") as f:
-            f.write(f"{_ts()} {txt}\n")
-    except Exception:
-        pass
-
-def run(cmd, log_cmd=True):
+    global _log_writer_started
+    if not _log_writer_started:
+        # double-checked under the lock: concurrent first loggers from the
+        # render pool must not each start a writer
+        with _log_writer_lock:
+            if not _log_writer_started:
+                threading.Thread(target=_log_writer, name="log", daemon=True).start()
+                _log_writer_started = True
+    _log_queue.put(f"{_ts()} {txt}\n")
+
+def run(cmd, log_cmd=True, raw_stdout=False, input=None, capture_stdout=False):
     """
     Run a subprocess command (list of args). Raises RuntimeError on non-zero exit.
-    Returns CompletedProcess with .stdout/.stderr as decoded text.
+    stdout goes to /dev/null unless asked for: capture_stdout=True returns it
+    decoded (probe parsing), raw_stdout=True returns it as raw bytes (piped
+    PCM output). ffmpeg diagnostics arrive on stderr, which is always kept.
+    `input` bytes, when given, are fed to the child's stdin.
     """
     if log_cmd:
         append_log("$ " + " ".join(cmd))
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # No preexec_fn/cwd/pass_fds here so CPython keeps its posix_spawn fast
+    # path — fork+exec is an order of magnitude slower on macOS and this
+    # function runs once or twice per cue.
+    out_dest = subprocess.PIPE if (raw_stdout or capture_stdout) else subprocess.DEVNULL
+    p = subprocess.run(cmd, stdout=out_dest, stderr=subprocess.PIPE, input=input)
     def _dec(b):
         try:
             return b.decode("utf-8", errors="strict")
@@ -58,19 +92,36 @@ def run(cmd, log_cmd=True):
                 return b.decode("utf-8", errors="replace")
             except Exception:
                 return b.decode("latin-1", errors="replace")
-    out = _dec(p.stdout)
+    out = p.stdout if raw_stdout else _dec(p.stdout or b"")
     err = _dec(p.stderr)
     if p.returncode != 0:
+        shown = f"<{len(out)} bytes>" if raw_stdout else out
         details = (
             "Command failed:\n"
-            f"$ {' '.join(cmd)}\n\nSTDOUT:\n{out}\n\nSTDERR:\n{err}"
+            f"$ {' '.join(cmd)}\n\nSTDOUT:\n{shown}\n\nSTDERR:\n{err}"
         )
         append_log(details)
         p.stdout, p.stderr = out, err
-        raise RuntimeError(details)
+        exc = RuntimeError(details)
+        # expose the child's stderr on its own so callers can classify the
+        # failure without substring-matching a message that embeds the argv
+        exc.stderr = err
+        raise exc
     p.stdout, p.stderr = out, err
     return p
 
+# On Apple Silicon, unprioritized daemon threads (and the say/ffmpeg children
+# they spawn) may be scheduled on efficiency cores. Tagging worker threads
+# QOS_CLASS_USER_INITIATED keeps the pipeline on performance cores.
+QOS_CLASS_USER_INITIATED = 0x19
+
+def set_worker_qos():
+    try:
+        libsystem = ctypes.CDLL("/usr/lib/libSystem.dylib")
+        libsystem.pthread_set_qos_class_self_np(QOS_CLASS_USER_INITIATED, 0)
+    except Exception as e:
+        append_log(f"QoS set failed: {e}")
+
 def which_ffmpeg():
     here = Path(__file__).resolve().parent
     cand1 = here / "bin" / "ffmpeg"
@@ -83,9 +134,13 @@ def which_say():
     p = Path("/usr/bin/say")
     return str(p) if p.exists() else shutil.which("say") or "say"
 
-FFMPEG = which_ffmpeg()
-SAY = which_say()
-AudioSegment.converter = FFMPEG  # used by pydub
+def _resolve_bin(path):
+    # Chase symlinks once here rather than in the kernel on every execve;
+    # bare names (nothing found) are left for PATH lookup.
+    return os.path.realpath(path) if os.path.isabs(path) else path
+
+FFMPEG = _resolve_bin(which_ffmpeg())
+SAY = _resolve_bin(which_say())
 
 # ---------- voice discovery (en_US only, Samantha first) ----------
 
@@ -93,7 +148,7 @@ VOICE_LINE_LOCALE_RE = re.compile(r'\b([a-z]{2}_[A-Z]{2})\b')
 VOICE_CLEAN_RE       = re.compile(r"\s*\(.*\)\s*$")  # strip trailing "(English (US))", etc.
 
 def _collect_say_voice_dump():
-    """Collect `say -v ?` style listings, merging stdout+stderr across a few flag variants."""
+    """Collect a `say -v ?` style listing, stopping at the first flag variant that yields output."""
     outs = []
     cmds = [
         [SAY, "-v", "?"],
@@ -107,12 +162,35 @@ def _collect_say_voice_dump():
             s_err = p.stderr.decode("utf-8", "replace")
             if s_out.strip(): outs.append(s_out)
             if s_err.strip(): outs.append(s_err)
+            if s_out.strip():
+                # This variant worked; the others are spellings of the same query.
+                break
         except Exception as e:
             append_log(f"voice dump attempt failed: {e}")
     return "\n".join(outs).strip()
 
+VOICE_TABLE_RE = re.compile(r"^(.+?)\s+([a-z]{2}_[A-Z]{2})\s+#")
+
 def parse_say_voice_lines(text: str):
     """Parse lines like: 'Samantha  en_US    # English (United States)' and variants."""
+    # say -v ? output is strictly tabular (name, locale, # comment), so one
+    # anchored regex per line covers the real format.
+    rows = []
+    for raw in text.splitlines():
+        m = VOICE_TABLE_RE.match(raw)
+        if m:
+            rows.append((" ".join(m.group(1).split()), m.group(2), raw))
+    if not rows:
+        rows = _parse_voice_lines_fuzzy(text)
+    # dedupe by name
+    seen = set(); dedup = []
+    for n,l,r in rows:
+        if n in seen: continue
+        seen.add(n); dedup.append((n,l,r))
+    return dedup
+
+def _parse_voice_lines_fuzzy(text: str):
+    """Heuristic fallback for listings that don't match the tabular format."""
     rows = []
     for raw in text.splitlines():
         line = raw.rstrip()
@@ -133,38 +211,79 @@ def parse_say_voice_lines(text: str):
                     if VOICE_LINE_LOCALE_RE.fullmatch(tok):
                         locale = tok
                         break
-        name = re.sub(r"\s+", " ", name).strip()
+        name = " ".join(name.split())
         if name:
             rows.append((name, locale, raw))
-    # dedupe by name
-    seen = set(); dedup = []
-    for n,l,r in rows:
-        if n in seen: continue
-        seen.add(n); dedup.append((n,l,r))
-    return dedup
+    return rows
 
-def voices_en_us():
-    """Return en_US voices with Samantha first; fall back to a minimal set only if dump fails."""
+VOICES_CACHE = CACHE_DIR / "voices.json"
+VOICES_SYS_DIR = "/System/Library/Speech/Voices"
+
+def _voices_dir_stamp():
+    """mtime of the system voices directory; changes when voices are (un)installed."""
+    try:
+        return os.stat(VOICES_SYS_DIR).st_mtime
+    except OSError:
+        return None
+
+def _load_cached_voices():
+    """Installed voices rarely change; reuse the last launch's parse when the
+    OS version and voices-directory mtime still match, skipping the say -v ?
+    spawns entirely."""
+    try:
+        data = json.loads(VOICES_CACHE.read_text(encoding="utf-8"))
+        if (data.get("os") == platform.mac_ver()[0]
+                and data.get("stamp") == _voices_dir_stamp()
+                and data.get("voices")):
+            return data["voices"]
+    except Exception:
+        pass
+    return None
+
+def _store_cached_voices(voices):
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        VOICES_CACHE.write_text(
+            json.dumps({"os": platform.mac_ver()[0],
+                        "stamp": _voices_dir_stamp(),
+                        "voices": voices}),
+            encoding="utf-8",
+        )
+    except Exception as e:
+        append_log(f"voice cache write failed: {e}")
+
+def voices_en_us(force: bool = False):
+    """Return en_US voices with Samantha first; fall back to a minimal set only if dump fails.
+
+    force=True skips the cache read and re-runs the say dump (the fresh
+    result is still written back for the next launch)."""
+    if not force:
+        cached = _load_cached_voices()
+        if cached:
+            return cached
     try:
         dump = _collect_say_voice_dump()
         if not dump:
             raise RuntimeError("empty say -v ? output")
         rows = parse_say_voice_lines(dump)
-        en = [n for (n,l,_r) in rows if l == "en_US"]
-        # Also include lines that imply US English but lacked explicit en_US token
-        en_extra = [n for (n,l,r) in rows if (l is None and ("(English (US))" in r or "(English (United States))" in r))]
-        for v in en_extra:
-            if v not in en:
-                en.append(v)
+        # Single pass: explicit en_US locale, or lines that imply US English
+        # without the token; set-dedupe while preserving first sighting.
+        seen = set(); en = []
+        for n, l, r in rows:
+            if l == "en_US" or (l is None and ("(English (US))" in r or "(English (United States))" in r)):
+                if n not in seen:
+                    seen.add(n); en.append(n)
         # Prefer Samantha first (either label)
-        if "Samantha" in en:
-            en = ["Samantha"] + [v for v in en if v != "Samantha"]
-        elif "Samantha (English (US))" in en:
-            en = ["Samantha (English (US))"] + [v for v in en if v != "Samantha (English (US))"]
+        for sam in ("Samantha", "Samantha (English (US))"):
+            if sam in seen:
+                en.remove(sam); en.insert(0, sam)
+                break
         if len(en) > 1:
             en[1:] = sorted(en[1:])
         if not en:
             en = ["Samantha", "Alex"]
+        else:
+            _store_cached_voices(en)
         return en
     except Exception as e:
         append_log(f"voices_list() failed: {e}")
@@ -173,140 +292,571 @@ def voices_en_us():
 # ---------- audio core ----------
 
 def compact(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip()
+    # str.split with no arg eats any whitespace run and strips the ends —
+    # same result as the old regex sub, all in C.
+    return " ".join(text.split())
+
+# Cues that are entirely marker groups or music glyphs ("[Music]",
+# "(applause)", "♪ ♪") describe sound that's already there; narrating them
+# wastes a full say+stretch pipeline per occurrence. Every group must be
+# closed — "[John] Hello [sighs]" has words outside the brackets and renders.
+NON_SPEECH_RE = re.compile(r"^\s*(?:\[[^\]]*\]|\([^)]*\)|♪[^♪]*♪|[♪\s])+$")
+
+# ---------- SRT parsing ----------
+
+Cue = namedtuple("Cue", "start_ms end_ms text")
+
+# One pass over the raw bytes; the srt package's per-line state machine and
+# timedelta objects are overkill when all we need is integer ms and text.
+CUE_RE = re.compile(
+    rb"(\d+):(\d+):(\d+)[,.](\d+)\s*-->\s*(\d+):(\d+):(\d+)[,.](\d+)[^\r\n]*\r?\n"
+    rb"(.*?)(?=\r?\n\r?\n|\Z)",
+    re.S,
+)
+
+def parse_srt(data):
+    """Parse SRT bytes (or any bytes-like buffer) into a list of Cue(start_ms, end_ms, text)."""
+    cues = []
+    for m in CUE_RE.finditer(data):
+        h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(g) for g in m.groups()[:8])
+        start = ((h1 * 60 + m1) * 60 + s1) * 1000 + ms1
+        end   = ((h2 * 60 + m2) * 60 + s2) * 1000 + ms2
+        text = m.group(9).decode("utf-8", errors="ignore").strip()
+        cues.append(Cue(start, end, text))
+    return cues
+
+def parse_srt_file(path: str):
+    """Parse an SRT file, letting the regex scan a read-only mmap so the
+    bytes are never copied into a Python object; falls back to a plain
+    read for empty/special files mmap refuses."""
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return parse_srt(mm)
+    except (ValueError, OSError):
+        return parse_srt(Path(path).read_bytes())
+
+def scratch_dir():
+    """Per-user Darwin temp dir for cue intermediates (fastest sanctioned
+    scratch location; falls back to the tempfile default elsewhere)."""
+    try:
+        d = os.confstr("CS_DARWIN_USER_TEMP_DIR")
+        if d and os.path.isdir(d):
+            return d
+    except (OSError, ValueError):
+        pass
+    return None
 
-def ms(td) -> int:
-    return int(td.total_seconds() * 1000)
+def _link_or_copy(src, dst):
+    """Hard-link src to dst (zero-copy on the same volume), else copy."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def _tts_cache_key(text: str, voice: str) -> str:
+    return hashlib.sha1(f"{voice or ''}|{RATE_WPM}|{text}".encode("utf-8")).hexdigest()
+
+def _prune_tts_cache():
+    """Drop least-recently-used cache entries until under CACHE_MAX_BYTES."""
+    try:
+        entries = []
+        total = 0
+        for de in os.scandir(CACHE_DIR):
+            # only the synth entries (*.snd) belong to this LRU; the dir
+            # also holds voices.json, which is rarely touched and would be
+            # a preferential eviction target
+            if de.is_file() and de.name.endswith(".snd"):
+                st = de.stat()
+                entries.append((st.st_mtime, st.st_size, de.path))
+                total += st.st_size
+        if total <= CACHE_MAX_BYTES:
+            return
+        entries.sort()  # oldest first
+        for _mtime, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= CACHE_MAX_BYTES:
+                break
+    except Exception as e:
+        append_log(f"cache prune failed: {e}")
+
+def mac_say_synth(text: str, out_path: str, voice: str = None):
+    """Use macOS 'say' to synthesize text at fixed -r RATE_WPM.
 
-def mac_say_to_aiff(text: str, out_path: str, voice: str = None):
-    """Use macOS 'say' to create AIFF at fixed -r RATE_WPM. Retry without -v if voice missing."""
+    Asks say for 48 kHz LEI16 WAVE directly (one less decode/resample for
+    the downstream ffmpeg pass); older macOS that rejects the format flags
+    falls back to plain AIFF. Retries without -v if the voice is missing.
+
+    Results are cached under CACHE_DIR keyed by (voice, rate, text) so
+    repeated lines ("[Music]", speaker tags, …) skip the say spawn entirely.
+    """
     # sanitize voice (strip trailing locale parentheses)
     if voice:
         voice = VOICE_CLEAN_RE.sub("", voice).strip()
 
-    def build_cmd(use_voice: bool):
+    cached = CACHE_DIR / f"{_tts_cache_key(text, voice)}.snd"
+    try:
+        os.utime(cached)  # refresh for LRU pruning; ENOENT == cache miss
+        _link_or_copy(cached, out_path)
+        append_log(f"TTS cache hit: {cached.name} text='{text[:60]}'")
+        return
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        append_log(f"TTS cache read failed: {e}")
+
+    def build_cmd(use_voice: bool, wave_fmt: bool):
         cmd = [SAY, "-o", out_path]
+        if wave_fmt:
+            cmd += ["--file-format=WAVE", "--data-format=LEI16@48000"]
+        else:
+            # be explicit: with no flag say infers the container from the
+            # extension, and .snd means NeXT audio, not AIFF
+            cmd += ["--file-format=AIFF"]
         if use_voice and voice:
             cmd += ["-v", voice]
         cmd += ["-r", str(RATE_WPM)]
         cmd += [text]
         return cmd
 
+    def say_stderr(e) -> str:
+        # classify failures on what say itself printed; the exception text
+        # also embeds the argv, which always mentions "format" in wave mode
+        return getattr(e, "stderr", "") or ""
+
+    def synth(wave_fmt: bool):
+        try:
+            run(build_cmd(use_voice=True, wave_fmt=wave_fmt))
+        except Exception as e:
+            err = say_stderr(e).lower()
+            if "voice" in err or "invalid" in err:
+                append_log("Retrying /usr/bin/say without -v …")
+                run(build_cmd(use_voice=False, wave_fmt=wave_fmt))
+            else:
+                raise
+
     append_log(f"TTS voice={voice or '(default)'} text='{text[:60]}'")
     try:
-        run(build_cmd(use_voice=True))
+        synth(wave_fmt=True)
     except Exception as e:
-        msg = str(e)
-        if "Voice" in msg or "voice" in msg or "Invalid" in msg:
-            append_log("Retrying /usr/bin/say without -v …")
-            run(build_cmd(use_voice=False))
+        if "format" in say_stderr(e).lower():
+            append_log("Retrying /usr/bin/say with AIFF output …")
+            synth(wave_fmt=False)
         else:
             raise
-    size = os.path.getsize(out_path) if os.path.exists(out_path) else 0
+    try:
+        size = os.stat(out_path).st_size  # one syscall instead of exists()+getsize()
+    except FileNotFoundError:
+        size = 0
     append_log(f"TTS OK: {out_path} ({size} bytes)")
 
-def aiff_to_wav(aiff_path: str, wav_path: str):
-    run([FFMPEG, "-y", "-i", aiff_path, "-ar", "48000", "-ac", "2", "-acodec", "pcm_s16le", wav_path], log_cmd=True)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _link_or_copy(out_path, cached)
+        _prune_tts_cache()
+    except Exception as e:
+        append_log(f"TTS cache write failed: {e}")
+
+_VERIFY_MAX_ERR_LINES = 50
 
 def verify_audio(wav_path: str):
-    run([FFMPEG, "-v", "error", "-i", wav_path, "-f", "null", "-"], log_cmd=True)
+    """Decode-check a file with ffmpeg, streaming stderr line-by-line.
+
+    Scanning stderr as it arrives (instead of buffering it whole) keeps the
+    check constant-memory even when a corrupt input makes ffmpeg spray one
+    error per frame.
+    """
+    cmd = [FFMPEG, "-v", "error", "-i", wav_path, "-f", "null", "-"]
+    append_log("$ " + " ".join(cmd))
+    p = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                         text=True, errors="replace")
+    err_lines = []
+    dropped = 0
+    for line in p.stderr:
+        if len(err_lines) < _VERIFY_MAX_ERR_LINES:
+            err_lines.append(line.rstrip())
+        else:
+            dropped += 1
+    rc = p.wait()
+    if rc != 0 or err_lines:
+        if dropped:
+            err_lines.append(f"… {dropped} more line(s)")
+        details = "Command failed:\n$ %s\n\nSTDERR:\n%s" % (" ".join(cmd), "\n".join(err_lines))
+        append_log(details)
+        raise RuntimeError(details)
     append_log("✅ verify_audio OK: %s size=%d bytes" % (wav_path, os.path.getsize(wav_path)))
 
-def time_stretch_to_duration(in_wav: str, out_wav: str, target_ms: int):
-    # create silence if needed
+def wav_duration_ms(path: str) -> int:
+    """Duration of a PCM WAV from its RIFF chunks alone — no full decode."""
+    with open(path, "rb") as f:
+        if f.read(4) != b"RIFF":
+            raise ValueError("not a RIFF file")
+        f.seek(12)  # skip size + 'WAVE'
+        byte_rate = None
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                break
+            cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+            if cid == b"fmt ":
+                fmt = f.read(size)
+                byte_rate = struct.unpack("<I", fmt[8:12])[0]
+            elif cid == b"data":
+                if not byte_rate:
+                    break
+                return int(size * 1000 / byte_rate)
+            else:
+                f.seek(size + (size & 1), 1)
+    raise ValueError("no fmt/data chunk found")
+
+def _float80(b: bytes) -> float:
+    """Decode the 80-bit extended float used by the AIFF COMM sample rate."""
+    exp = ((b[0] & 0x7F) << 8) | b[1]
+    mant = int.from_bytes(b[2:10], "big")
+    if exp == 0 and mant == 0:
+        return 0.0
+    return mant * 2.0 ** (exp - 16383 - 63)
+
+def aiff_duration_ms(path: str) -> int:
+    """Duration of an AIFF/AIFF-C from the COMM chunk alone — no full decode."""
+    with open(path, "rb") as f:
+        if f.read(4) != b"FORM":
+            raise ValueError("not an IFF file")
+        f.seek(12)  # skip size + 'AIFF'/'AIFC'
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                break
+            cid, size = hdr[:4], struct.unpack(">I", hdr[4:])[0]
+            if cid == b"COMM":
+                comm = f.read(size)
+                frames = struct.unpack(">I", comm[2:6])[0]
+                rate = _float80(comm[8:18])
+                if rate <= 0:
+                    break
+                return int(frames * 1000 / rate)
+            f.seek(size + (size & 1), 1)
+    raise ValueError("no COMM chunk found")
+
+def audio_duration_ms(path: str) -> int:
+    """Header-only duration for the WAV/AIFF intermediates this app produces."""
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic == b"RIFF":
+        return wav_duration_ms(path)
+    if magic == b"FORM":
+        return aiff_duration_ms(path)
+    raise ValueError(f"unrecognized audio container: {magic!r}")
+
+ATEMPO_RANGE_RE = re.compile(r"tempo.*?from\s+([\d.]+)\s+to\s+([\d.]+)", re.I | re.S)
+
+@functools.lru_cache(maxsize=1)
+def atempo_max() -> float:
+    """Upper bound of a single atempo stage for the bundled ffmpeg.
+
+    Older ffmpeg caps atempo at 2.0 per stage; newer builds accept up to
+    100.0 in one filter. Probed once via `ffmpeg -h filter=atempo` so large
+    stretches can use a single stage instead of a chained WSOLA cascade.
+    """
+    try:
+        p = run([FFMPEG, "-hide_banner", "-h", "filter=atempo"], log_cmd=False, capture_stdout=True)
+        m = ATEMPO_RANGE_RE.search(p.stdout + p.stderr)
+        amax = float(m.group(2)) if m else 2.0
+    except Exception as e:
+        append_log(f"atempo probe failed: {e}")
+        amax = 2.0
+    append_log(f"atempo max per stage: {amax}")
+    return amax
+
+@functools.lru_cache(maxsize=1)
+def has_rubberband() -> bool:
+    """Whether the bundled ffmpeg was built with librubberband.
+
+    rubberband stretches any factor in one pass with better speech quality
+    than a chained atempo cascade; most stock builds lack it, so probe once.
+    """
+    try:
+        p = run([FFMPEG, "-hide_banner", "-filters"], log_cmd=False, capture_stdout=True)
+        avail = " rubberband " in p.stdout
+    except Exception as e:
+        append_log(f"rubberband probe failed: {e}")
+        avail = False
+    append_log(f"rubberband filter available: {avail}")
+    return avail
+
+def stretch_filter(factor: float) -> str:
+    """Filter expression for a tempo change by factor (rubberband or atempo chain)."""
+    if has_rubberband():
+        return f"rubberband=tempo={factor:.6f}"
+    return ",".join(f"atempo={s:.6f}" for s in atempo_chain(factor))
+
+# Silence ffmpeg's banner and progress chatter on hot-path commands; real
+# errors still come through at -loglevel error.
+FF_QUIET_ARGS = ["-hide_banner", "-loglevel", "error", "-nostats"]
+
+# The whole internal pipeline is mono: say synthesizes a single channel, so
+# a second one would just double every byte moved through stretch, mix and
+# pipe. The mux upmixes once at the very end.
+PCM_OUT_ARGS = ["-f", "s16le", "-ar", "48000", "-ac", "1", "-acodec", "pcm_s16le"]
+PCM_BYTES_PER_MS = 48 * 2  # frames/ms × sample width (mono)
+
+def _wav_pcm_48k(path: str):
+    """Return (channels, data bytes) for a 48 kHz s16 PCM WAV, else None.
+
+    This is exactly what say emits with --data-format=LEI16@48000, letting
+    the no-stretch fast path lift the samples without an ffmpeg spawn.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) != b"RIFF":
+                return None
+            f.seek(12)
+            channels = None
+            while True:
+                hdr = f.read(8)
+                if len(hdr) < 8:
+                    return None
+                cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+                if cid == b"fmt ":
+                    fmt = f.read(size)
+                    audio_fmt, channels, rate = struct.unpack("<HHI", fmt[:8])
+                    bits = struct.unpack("<H", fmt[14:16])[0]
+                    if audio_fmt != 1 or rate != 48000 or bits != 16 or channels not in (1, 2):
+                        return None
+                elif cid == b"data":
+                    if channels is None:
+                        return None
+                    return channels, f.read(size)
+                else:
+                    f.seek(size + (size & 1), 1)
+    except OSError:
+        return None
+
+def atempo_chain(factor: float):
+    """Decompose factor into atempo stages in closed form.
+
+    The stage count comes straight from log2 instead of peeling 2.0/0.5
+    steps off in a loop; the product of the returned stages equals factor.
+    """
+    amax = atempo_max()
+    if factor > amax:
+        k = max(1, math.ceil(math.log2(factor / amax)))
+        if factor / (1 << k) > amax:  # guard against log2 rounding
+            k += 1
+        return [2.0] * k + [factor / (1 << k)]
+    if factor < 0.5:
+        k = max(1, math.ceil(math.log2(0.5 / factor)))
+        if factor * (1 << k) < 0.5:
+            k += 1
+        return [0.5] * k + [factor * (1 << k)]
+    return [factor]
+
+def time_stretch_to_duration(in_audio: str, target_ms: int) -> bytes:
+    """Fit in_audio (AIFF or WAV) to target_ms; returns raw 48 kHz mono s16 PCM.
+
+    The fitted audio is streamed out of ffmpeg's stdout instead of being
+    written to a temp WAV and re-read, so each cue costs one process and
+    zero intermediate files beyond the synth output.
+    """
+    # silence is just zeroed PCM — no point spawning ffmpeg's anullsrc for it
     if target_ms <= 0:
-        run([FFMPEG, "-y", "-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo",
-             "-t", f"{max(target_ms/1000.0, 0.001):.6f}", out_wav])
-        return
-    # measure input duration
+        return bytes(PCM_BYTES_PER_MS)  # 1 ms of silence
+    # measure input duration (header read only — no PCM decode)
     try:
-        seg = AudioSegment.from_wav(in_wav)
-        cur_ms = len(seg)
+        cur_ms = audio_duration_ms(in_audio)
     except Exception:
         cur_ms = 0
     if cur_ms <= 0:
-        run([FFMPEG, "-y", "-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo",
-             "-t", f"{target_ms/1000.0:.6f}", out_wav])
-        return
+        return bytes(target_ms * PCM_BYTES_PER_MS)
 
     factor = (target_ms / 1000.0) / (cur_ms / 1000.0)
 
-    def stage(infile, outfile, f):
-        # split into chained atempo steps within [0.5, 2.0]
-        steps = []
-        r = f
-        while r > 2.0 or r < 0.5:
-            if r > 2.0:
-                steps.append(2.0); r /= 2.0
-            else:
-                steps.append(0.5); r /= 0.5
-        steps.append(r)
-        filt = ",".join(f"atempo={s:.6f}" for s in steps)
-        run([FFMPEG, "-y", "-i", infile, "-af", filt, outfile])
-
-    with tempfile.TemporaryDirectory() as td:
-        tmp = os.path.join(td, "st.wav")
-        stage(in_wav, tmp, factor)
-        # hard trim/pad to exact target
-        run([FFMPEG, "-y", "-i", tmp, "-t", f"{target_ms/1000.0:.6f}", out_wav])
-
-def build_timed_track_from_srt(srt_path: str, voice: str = None, status_cb=None) -> AudioSegment:
+    # Degenerate cue/synth ratios (a near-empty synth against a long window,
+    # or vice versa) can ask for absurd factors that blow up the filter and
+    # would be unintelligible anyway; cap at 16x either direction.
+    if not (0.0625 <= factor <= 16.0):
+        append_log(f"stretch factor {factor:.4f} clamped for {in_audio}")
+        factor = min(16.0, max(0.0625, factor))
+
+    # At a fixed 200 WPM the natural length often lands within a few percent
+    # of the cue window; skip the WSOLA stretch entirely in that case (the
+    # ffmpeg pass still runs for the 48 kHz/mono/s16 conversion and trim).
+    if 0.97 <= factor <= 1.03:
+        # When say already delivered 48 kHz s16 WAVE, lift the PCM straight
+        # out of the file and trim — no subprocess at all.
+        src = _wav_pcm_48k(in_audio)
+        if src is not None:
+            channels, data = src
+            pcm = data if channels == 1 else audioop.tomono(data, 2, 0.5, 0.5)
+            limit = target_ms * PCM_BYTES_PER_MS
+            return pcm[:limit - (limit % 2)]  # short clips pad via the zeroed mix
+        filt = None
+    else:
+        # single rubberband pass when built in; otherwise atempo (one stage
+        # on newer ffmpeg even for extreme ratios)
+        filt = stretch_filter(factor)
+
+    # One invocation: decode (AIFF or WAV), stretch, resample to the target
+    # format and hard trim/pad to the exact duration.
+    cmd = [FFMPEG] + FF_QUIET_ARGS + ["-i", in_audio]
+    if filt:
+        cmd += ["-af", filt]
+    cmd += PCM_OUT_ARGS + ["-t", f"{target_ms/1000.0:.6f}", "pipe:1"]
+    return run(cmd, raw_stdout=True).stdout
+
+def write_wav(path: str, pcm: bytes):
+    """Write raw 48 kHz mono s16 PCM as a WAV via the stdlib — no ffmpeg spawn."""
+    import wave
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(48000)
+        w.writeframes(pcm)
+
+def build_timed_track_from_srt(srt_path: str, voice: str = None, status_cb=None,
+                               workdir: str = None) -> bytearray:
     # --- STATUS: Parsing subtitles… ---
     if status_cb: status_cb("Parsing subtitles…")
-    with open(srt_path, "r", encoding="utf-8-sig", errors="ignore") as f:
-        subs = list(srt.parse(f.read()))
+    subs = parse_srt_file(srt_path)
     if not subs:
         raise ValueError("No subtitles found in SRT.")
     # --- STATUS: Parsed N subtitle(s) ---
     if status_cb: status_cb(f"Parsed {len(subs)} subtitle(s)")
     append_log(f"Parsing SRT: {srt_path}\nSRT cues: {len(subs)}")
 
-    total_ms = ms(subs[-1].end) + 500
-    timeline = AudioSegment.silent(duration=total_ms, frame_rate=48000).set_channels(2)
-
-    with tempfile.TemporaryDirectory() as td:
-        for i, cue in enumerate(subs, start=1):
-            text = compact(cue.content)
-            if not text:
-                continue
-            # --- STATUS: Generating speech i/N (P%) ---
-            if status_cb:
-                pct = int(round(i * 100.0 / len(subs)))
-                status_cb(f"Generating speech: {i}/{len(subs)} ({pct}%)")
-
-            aiff = os.path.join(td, f"{i:04d}.aiff")
-            wav  = os.path.join(td, f"{i:04d}.wav")
-            fit  = os.path.join(td, f"{i:04d}_fit.wav")
-
-            mac_say_to_aiff(text, aiff, voice=voice)
-            aiff_to_wav(aiff, wav)
-            verify_audio(wav)
-
-            target = ms(cue.end - cue.start)
-            target = max(target, 120)  # minimum audibility
-            time_stretch_to_duration(wav, fit, target)
-            verify_audio(fit)
-
-            start = ms(cue.start)
-            seg = AudioSegment.from_wav(fit)
-            timeline = timeline.overlay(seg, position=start)
-
-    return timeline
-
+    total_ms = subs[-1].end_ms + 500
+    # One preallocated 48 kHz/mono/s16 PCM buffer for the whole track.
+    # pydub's overlay() rewrites the full timeline on every call (O(N·total));
+    # summing each clip into its slice with audioop keeps the mix O(total).
+    mix = bytearray(total_ms * PCM_BYTES_PER_MS)
+
+    # The job's scratch dir is usually owned by the caller (one directory per
+    # run, one recursive cleanup); create a private one only when standalone.
+    own_td = None
+    if workdir is None:
+        own_td = tempfile.TemporaryDirectory(dir=scratch_dir())
+        workdir = own_td.name
+    td = workdir
+    try:
+        # In-run memo: repeated lines reuse the first synth's AIFF directly,
+        # skipping even the disk-cache link. Only the stretch differs per cue.
+        synth_memo = {}
+        memo_lock = threading.Lock()
+
+        def render_cue(i, cue):
+            """Synthesize + fit one cue; returns (start_ms, raw PCM bytes). Thread-safe."""
+            text = compact(cue.text)
+            if not text or NON_SPEECH_RE.match(text):
+                # the preallocated silent mix already covers the gap
+                return None
+
+            with memo_lock:
+                snd = synth_memo.get(text)
+            if snd is None:
+                # .snd: container-neutral — WAVE normally, AIFF on the
+                # older-macOS fallback; the duration probe sniffs the magic.
+                snd = os.path.join(td, f"{i:04d}.snd")
+                mac_say_synth(text, snd, voice=voice)
+                with memo_lock:
+                    synth_memo.setdefault(text, snd)
+
+            target = max(cue.end_ms - cue.start_ms, 120)  # minimum audibility
+            pcm = time_stretch_to_duration(snd, target)
+            if not pcm:
+                append_log(f"cue {i}: empty PCM from stretch")
+                return None
+
+            return cue.start_ms, pcm
+
+        # Each cue is an independent say+ffmpeg pipeline; the work is
+        # subprocess-bound (GIL released while waiting), so a thread pool
+        # overlaps the spawns across cores. Clips are summed into the mix
+        # as they complete — addition is order-independent, mixing hides
+        # behind the renders still in flight, and no finished clip is held
+        # longer than one loop iteration.
+        done = 0
+        status_lock = threading.Lock()
+        mv = memoryview(mix)
+        workers = min(len(subs), os.cpu_count() or 4)
+        with ThreadPoolExecutor(max_workers=workers,
+                                initializer=set_worker_qos,
+                                thread_name_prefix="cue") as ex:
+            futures = [ex.submit(render_cue, i, cue)
+                       for i, cue in enumerate(subs, start=1)]
+            for fut in as_completed(futures):
+                try:
+                    res = fut.result()
+                except BaseException:
+                    # One bad cue aborts the job: drop everything still
+                    # queued so the error surfaces now instead of after the
+                    # remaining cues grind through their pipelines.
+                    ex.shutdown(wait=False, cancel_futures=True)
+                    raise
+                with status_lock:
+                    done += 1
+                    if status_cb:
+                        pct = int(round(done * 100.0 / len(subs)))
+                        status_cb(f"Generating speech: {done}/{len(subs)} ({pct}%)")
+                if res is None:
+                    continue
+                start, clip = res
+                off = start * PCM_BYTES_PER_MS
+                end = min(off + len(clip), len(mix))
+                if end <= off:
+                    continue
+                # audioop.add is C-level and saturates at int16, so no
+                # separate clipping pass is needed after the sum. Reading
+                # through a memoryview keeps the source slice zero-copy.
+                mv[off:end] = audioop.add(mv[off:end], clip[:end - off], 2)
+        mv.release()
+    finally:
+        if own_td is not None:
+            own_td.cleanup()
+
+    return mix
+
+@functools.lru_cache(maxsize=1)
 def pick_mux_encoders():
+    """Probe available AAC encoders once per launch; the answer is fixed per binary."""
     try:
-        enc = run([FFMPEG, "-hide_banner", "-encoders"]).stdout
+        enc = run([FFMPEG, "-hide_banner", "-encoders"], capture_stdout=True).stdout
+        has_fdk    = " libfdk_aac " in enc
         has_aac_at = " aac_at " in enc
         has_aac    = re.search(r'^\s*A\.*\s+aac\s', enc, re.MULTILINE) is not None
         encs = []
+        # libfdk_aac is the fastest software AAC when the build carries it;
+        # aac_at stays next (hardware-assisted on Apple silicon).
+        if has_fdk:    encs.append(("libfdk_aac", []))
         if has_aac_at: encs.append(("aac_at", []))
-        if has_aac:    encs.append(("aac", []))
-        encs.append(("aac", ["-strict", "-2"]))
+        if has_aac or not encs:
+            encs.append(("aac", []))
         return encs
     except Exception:
-        return [("aac_at", []), ("aac", []), ("aac", ["-strict", "-2"])]
+        return [("aac_at", []), ("aac", [])]
+
+def prewarm_probes():
+    """Run the one-time ffmpeg capability probes off the launch path.
 
-def replace_video_audio(in_video: str, in_audio: str, out_video: str):
+    Kicked off on a daemon thread at startup: the first ffmpeg spawn also
+    pays dyld/code-sign warmup for the bundled binary, so by the time a job
+    starts every capability cache is hot and no probe lands on the hot path.
+    """
+    def _warm():
+        try:
+            atempo_max()
+            has_rubberband()
+            pick_mux_encoders()
+        except Exception as e:
+            append_log(f"prewarm failed: {e}")
+    threading.Thread(target=_warm, name="prewarm", daemon=True).start()
+
+def replace_video_audio(in_video: str, audio_pcm: bytes, out_video: str):
+    """Mux raw 48 kHz mono s16 narration PCM (fed via stdin) over in_video;
+    the encoder upmixes to stereo in the same pass."""
     encoders = pick_mux_encoders()
     append_log(f"Mux encoders: {encoders}")
     last_err = None
@@ -314,16 +864,22 @@ def replace_video_audio(in_video: str, in_audio: str, out_video: str):
         try:
             cmd = [
                 FFMPEG, "-y",
-                "-i", in_video, "-i", in_audio,
+            ] + FF_QUIET_ARGS + [
+                "-i", in_video,
+                "-f", "s16le", "-ar", "48000", "-ac", "1", "-i", "pipe:0",
                 "-map", "0:v:0", "-map", "1:a:0",
+                # -threads is an output option here; before the inputs it
+                # would only govern decode of the copied video stream
+                "-threads", "0",
                 "-c:v", "copy", "-c:a", enc, "-b:a", "192k",
                 "-ar", "48000", "-ac", "2",
-                "-movflags", "+faststart",
-                "-shortest", out_video
             ]
+            if FASTSTART:
+                cmd += ["-movflags", "+faststart"]
+            cmd += ["-shortest", out_video]
             if extra:
                 cmd = cmd[:-1] + extra + [cmd[-1]]
-            run(cmd)
+            run(cmd, input=audio_pcm)
             append_log(f"✅ mux ok {enc} -> {out_video}")
             return
         except Exception as e:
@@ -363,10 +919,44 @@ class App(NSObject):
         self.video_path = None
         self.srt_path = None
         self.voice = None
-        self.voices = voices_en_us()
+        self._last_status_t = 0.0
+        self._alert_queue = []
+        self._alert_active = False
+        # Build the UI from the cached list (or the minimal fallback) so
+        # launch never waits on say; a background refresh reconciles.
+        self.voices = _load_cached_voices() or ["Samantha", "Alex"]
         self._build_ui()
+        prewarm_probes()
+        threading.Thread(target=self._refresh_voices, name="voices", daemon=True).start()
         return self
 
+    @python_method
+    def _refresh_voices(self):
+        """Re-run voice discovery off the main thread and swap the popup if
+        the list changed. Bypasses the cache: the voices-dir mtime stamp
+        can't see user-installed voices (they land on the data volume), so
+        the say dump itself is the ground truth, reconciled once per run."""
+        try:
+            voices = voices_en_us(force=True)
+        except Exception as e:
+            append_log(f"voice refresh failed: {e}")
+            return
+        if voices == self.voices:
+            return
+        def _apply():
+            current = self.voicePop.titleOfSelectedItem()
+            self.voices = voices
+            self.voicePop.removeAllItems()
+            for v in voices:
+                self.voicePop.addItemWithTitle_(v)
+            idx = self.voicePop.indexOfItemWithTitle_(current) if current else -1
+            if idx == -1:
+                idx = self.voicePop.indexOfItemWithTitle_("Samantha")
+            if idx == -1:
+                idx = self.voicePop.indexOfItemWithTitle_("Samantha (English (US))")
+            self.voicePop.selectItemAtIndex_(idx if idx != -1 else 0)
+        NSOperationQueue.mainQueue().addOperationWithBlock_(_apply)
+
     # ---- Main-thread UI helpers ----
 
     @python_method
@@ -381,13 +971,32 @@ class App(NSObject):
         try:
             if txt is None:
                 txt = ""
-            # Send directly to the NSTextField on the main thread
-            self.statusLbl.performSelectorOnMainThread_withObject_waitUntilDone_("setStringValue:", str(txt), False)
+            # Coalesce the per-cue progress flood: at most one main-thread
+            # hop per 50 ms. Milestone messages always go through.
+            if txt.startswith("Generating speech"):
+                now = time.monotonic()
+                if now - self._last_status_t < 0.05:
+                    return
+                self._last_status_t = now
+            # Hop to the main thread as a queued block (same route as alerts)
+            txt = str(txt)
+            NSOperationQueue.mainQueue().addOperationWithBlock_(
+                lambda: self.statusLbl.setStringValue_(txt)
+            )
         except Exception:
             pass
 
     # ---- Build UI ----
 
+    @python_method
+    def _make_label(self, parent, frame, text):
+        """Read-only borderless NSTextField — the only label style used here."""
+        lbl = NSTextField.alloc().initWithFrame_(frame)
+        lbl.setBezeled_(False); lbl.setEditable_(False); lbl.setDrawsBackground_(False)
+        lbl.setStringValue_(text)
+        parent.addSubview_(lbl)
+        return lbl
+
     @python_method
     def _build_ui(self):
         W, H = 640, 210
@@ -403,34 +1012,17 @@ class App(NSObject):
         c = self.win.contentView()
 
         # Top status line
-        self.statusLbl = NSTextField.alloc().initWithFrame_(NSMakeRect(12, H-30, W-24, 22))
-        self.statusLbl.setBezeled_(False); self.statusLbl.setEditable_(False); self.statusLbl.setDrawsBackground_(False)
-        self.statusLbl.setStringValue_("Idle")
-        c.addSubview_(self.statusLbl)
-
-        info = NSTextField.alloc().initWithFrame_(NSMakeRect(12, H-52, W-24, 18))
-        info.setBezeled_(False); info.setEditable_(False); info.setDrawsBackground_(False)
-        info.setStringValue_("Drop a .mp4 and a .srt. Pick a voice, then Replace Audio. (Rate fixed at 200 WPM)")
-        c.addSubview_(info)
+        self.statusLbl = self._make_label(c, NSMakeRect(12, H-30, W-24, 22), "Idle")
+        self._make_label(c, NSMakeRect(12, H-52, W-24, 18),
+                         "Drop a .mp4 and a .srt. Pick a voice, then Replace Audio. (Rate fixed at 200 WPM)")
 
         self.drop = DropView.alloc().initWithOwner_(self)
         self.drop.setFrame_(NSMakeRect(12, 64, W-24, 88))
         c.addSubview_(self.drop)
 
-        self.vidLbl = NSTextField.alloc().initWithFrame_(NSMakeRect(12, 46, W-24, 16))
-        self.vidLbl.setBezeled_(False); self.vidLbl.setEditable_(False); self.vidLbl.setDrawsBackground_(False)
-        self.vidLbl.setStringValue_("Video: —")
-        c.addSubview_(self.vidLbl)
-
-        self.srtLbl = NSTextField.alloc().initWithFrame_(NSMakeRect(12, 30, W-24, 16))
-        self.srtLbl.setBezeled_(False); self.srtLbl.setEditable_(False); self.srtLbl.setDrawsBackground_(False)
-        self.srtLbl.setStringValue_("Subtitles: —")
-        c.addSubview_(self.srtLbl)
-
-        vLbl = NSTextField.alloc().initWithFrame_(NSMakeRect(12, 10, 44, 18))
-        vLbl.setBezeled_(False); vLbl.setEditable_(False); vLbl.setDrawsBackground_(False)
-        vLbl.setStringValue_("Voice:")
-        c.addSubview_(vLbl)
+        self.vidLbl = self._make_label(c, NSMakeRect(12, 46, W-24, 16), "Video: —")
+        self.srtLbl = self._make_label(c, NSMakeRect(12, 30, W-24, 16), "Subtitles: —")
+        self._make_label(c, NSMakeRect(12, 10, 44, 18), "Voice:")
 
         self.voicePop = NSPopUpButton.alloc().initWithFrame_pullsDown_(NSMakeRect(54, 6, 200, 24), False)
 
@@ -487,15 +1079,30 @@ class App(NSObject):
             # Strip any trailing parenthetical like " (English (US))"
             self.voice = VOICE_CLEAN_RE.sub("", self.voice).strip()
 
-    @typedSelector(b"v@:@")
-    def _showAlert_(self, payload):
-        title = payload.get("title", "Error")
-        message = payload.get("message", "")
+    @python_method
+    def showAlert(self, title: str, message: str):
+        """Queue an alert from any thread; shown as a window sheet, one at a
+        time, so burst errors can't stack modals or starve the runloop."""
+        def _enqueue():
+            self._alert_queue.append((title, str(message)[:8000]))
+            self._present_next_alert()
+        NSOperationQueue.mainQueue().addOperationWithBlock_(_enqueue)
+
+    @python_method
+    def _present_next_alert(self):
+        # Main thread only (reached via the main operation queue).
+        if self._alert_active or not self._alert_queue:
+            return
+        title, message = self._alert_queue.pop(0)
+        self._alert_active = True
         alert = NSAlert.alloc().init()
         alert.setMessageText_(title)
-        alert.setInformativeText_(message[:8000])
+        alert.setInformativeText_(message)
         alert.setAlertStyle_(NSAlertStyleInformational)
-        alert.runModal()
+        def _done(_response):
+            self._alert_active = False
+            self._present_next_alert()
+        alert.beginSheetModalForWindow_completionHandler_(self.win, _done)
 
     @typedSelector(b"v@:")
     def _restoreButton(self):
@@ -509,8 +1116,7 @@ class App(NSObject):
     @typedSelector(b"v@:@")
     def onReplace_(self, sender):
         if not (self.video_path and self.srt_path):
-            payload = {"title": "Missing Files", "message": "Drop both a .mp4 and a .srt first."}
-            self.performSelectorOnMainThread_withObject_waitUntilDone_("_showAlert:", payload, False)
+            self.showAlert("Missing Files", "Drop both a .mp4 and a .srt first.")
             return
 
         self.btnReplace.setTitle_("Adding Audio…")
@@ -521,35 +1127,37 @@ class App(NSObject):
     @python_method
     def _do_replace(self):
         out_mp4 = None
+        set_worker_qos()
         try:
             append_log("— App launched —")
             append_log(f"FFMPEG={FFMPEG}\nSAY={SAY}")
 
             # --- STATUS: Parsing subtitles… + per-cue updates inside builder ---
             self.setStatus("Parsing subtitles…")
-            timeline = build_timed_track_from_srt(
-                self.srt_path,
-                voice=self.voice,
-                status_cb=self.setStatus
-            )
-
-            with tempfile.TemporaryDirectory() as td:
+            # One scratch dir for the whole job: single create, single
+            # recursive cleanup, and all temp artifacts on one filesystem.
+            with tempfile.TemporaryDirectory(dir=scratch_dir()) as td:
+                narration = build_timed_track_from_srt(
+                    self.srt_path,
+                    voice=self.voice,
+                    status_cb=self.setStatus,
+                    workdir=td
+                )
+
+            # The narration PCM is piped straight into the mux ffmpeg; the
+            # on-disk narration.wav only exists as a debug artifact now.
+            if DEBUG_KEEP_FILES:
                 out_dir = Path.home() / "Desktop" / "SayMySubtitles-Debug"
-                if DEBUG_KEEP_FILES:
-                    out_dir.mkdir(parents=True, exist_ok=True)
-                    narr_path = out_dir / "narration.wav"
-                else:
-                    narr_path = Path(td) / "narration.wav"
-
-                # --- STATUS: Exporting narration… ---
+                out_dir.mkdir(parents=True, exist_ok=True)
+                narr_path = out_dir / "narration.wav"
                 self.setStatus("Exporting narration…")
-                timeline.export(str(narr_path), format="wav")
+                write_wav(str(narr_path), narration)
                 verify_audio(str(narr_path))
 
-                # --- STATUS: Muxing into video… ---
-                self.setStatus("Muxing into video…")
-                out_mp4 = str(Path(self.video_path).with_name(Path(self.video_path).stem + "_tts_audio.mp4"))
-                replace_video_audio(self.video_path, str(narr_path), out_mp4)
+            # --- STATUS: Muxing into video… ---
+            self.setStatus("Muxing into video…")
+            out_mp4 = str(Path(self.video_path).with_name(Path(self.video_path).stem + "_tts_audio.mp4"))
+            replace_video_audio(self.video_path, narration, out_mp4)
 
             # --- STATUS: Done ---
             self.setStatus("Done")
@@ -559,8 +1167,7 @@ class App(NSObject):
         except Exception as e:
             msg = str(e)
             append_log("ERROR: " + msg)
-            payload = {"title": "Command Error", "message": msg}
-            self.performSelectorOnMainThread_withObject_waitUntilDone_("_showAlert:", payload, False)
+            self.showAlert("Command Error", msg)
             self.setStatus("Error")
         finally:
             self.performSelectorOnMainThread_withObject_waitUntilDone_("_restoreButton", None, False)